@@ -13,18 +13,32 @@ custom_palette = [
     '#D7BDE2'  # Lavender
 ]
 
-def get_activity_color_map(df):
+def get_activity_totals(df):
+    """
+    Total Work Time (Mins) and Hours per Activity Category, sorted descending.
+    Shared by the color map and the activity plots so the frame is only grouped once.
+    """
+    return df.groupby('Activity Category', observed=True, sort=False)[['Work Time (Mins)', 'Hours']].sum().sort_values('Work Time (Mins)', ascending=False)
+
+def get_activity_color_map(df, totals=None):
     """
     Generates a consistent color map based on global Total Hours descending.
     Ensures the top category (e.g. Training) always gets the first color (Red),
     regardless of the specific subset of data being plotted.
     Special handling: "Other Activities" gets gray color.
+    Pass precomputed `totals` (see get_activity_totals) to skip the groupby.
+    """
+    if totals is None:
+        totals = get_activity_totals(df)
+    return build_activity_color_map(totals.index.tolist())
+
+def build_activity_color_map(categories):
+    """
+    Color map for Activity Categories already ranked by Total Hours descending
+    (palette assigned in that order, "Other" categories in gray).
     """
-    # Group by Category and sort by Total Hours Descending
-    cat_order = df.groupby('Activity Category')['Work Time (Mins)'].sum().sort_values(ascending=False).index.tolist()
-    
     color_map = {}
-    for i, cat in enumerate(cat_order):
+    for i, cat in enumerate(categories):
         # Special case: Assign gray to "Other" activities
         if 'other' in str(cat).lower():
             color_map[cat] = '#B0B0B0'  # Light Gray
@@ -39,9 +53,8 @@ def plot_activity_stacked_bar(df, color_map=None):
     Stacked Bar Chart replacing Sunburst.
     X=Facilitator, Y=Hours, Color=Activity Category.
     """
-    df_clean = df[df['Work Time (Mins)'] > 0].copy()
-    grouped = df_clean.groupby(['Employee Name', 'Activity Category'])['Work Time (Mins)'].sum().reset_index()
-    grouped['Hours'] = (grouped['Work Time (Mins)'] / 60).round(1)
+    df_clean = df[df['Work Time (Mins)'] > 0]
+    grouped = df_clean.groupby(['Employee Name', 'Activity Category'], observed=True)['Hours'].sum().round(1).reset_index()
     
     # If no map provided, generate local one (fallback)
     if color_map is None:
@@ -58,13 +71,16 @@ def plot_activity_stacked_bar(df, color_map=None):
     fig.update_layout(margin=dict(l=20, r=20, t=50, b=20))
     return fig
 
-def plot_activity_treemap(df, color_map=None):
-    grouped = df.groupby('Activity Category')['Work Time (Mins)'].sum().reset_index()
-    grouped['Hours'] = (grouped['Work Time (Mins)'] / 60).round(1)
+def plot_activity_treemap(df, color_map=None, totals=None):
+    if totals is None:
+        totals = get_activity_totals(df)
+    grouped = totals.round({'Hours': 1}).reset_index()
+    # px.treemap aggregates the path column, which a Categorical does not support
+    grouped['Activity Category'] = grouped['Activity Category'].astype(str)
     
-    # If no map provided, generate local one
+    # If no map provided, generate local one from the same totals
     if color_map is None:
-        color_map = get_activity_color_map(df)
+        color_map = get_activity_color_map(df, totals=totals)
     
     fig = px.treemap(grouped, path=['Activity Category'], values='Hours',
                      title="Total Time Investment by Activity Type (Hours)",
@@ -74,16 +90,17 @@ def plot_activity_treemap(df, color_map=None):
     fig.update_layout(margin=dict(l=10, r=10, t=40, b=10))
     return fig
 
-def plot_activity_breakdown_bar(df, colors=None):
-    grouped = df.groupby('Activity Category')['Work Time (Mins)'].sum().sort_values(ascending=False).reset_index()
-    grouped['Hours'] = (grouped['Work Time (Mins)'] / 60).round(1)
+def plot_activity_breakdown_bar(df, colors=None, totals=None):
+    if totals is None:
+        totals = get_activity_totals(df)
+    grouped = totals.round({'Hours': 1}).reset_index()
     total_hours = grouped['Hours'].sum()
     grouped['%'] = (grouped['Hours'] / total_hours * 100).round(1).astype(str) + '%'
     
     # Using 'Plasma' for safe colors
     
     fig = px.bar(grouped, x='Hours', y='Activity Category',
-                 text=grouped.apply(lambda x: f"{x['Hours']}h ({x['%']})", axis=1),
+                 text=grouped['Hours'].astype(str) + 'h (' + grouped['%'] + ')',
                  orientation='h',
                  title="Detailed Activity Breakdown (Hours & %)",
                  labels={'Activity Category': 'Activity', 'Hours': 'Hours'},
@@ -98,11 +115,12 @@ def plot_priority_compliance(df, colors=None):
     if 'Task Priority' not in df.columns:
         return None
         
-    df_prio = df[df['Task Priority'].notna() & (df['Task Priority'] != '')].copy()
-    grouped = df_prio.groupby(['Employee Name', 'Task Priority'])['Work Time (Mins)'].count().reset_index(name='Task Count')
+    df_prio = df[df['Task Priority'].notna() & (df['Task Priority'] != '')]
+    grouped = df_prio.groupby(['Employee Name', 'Task Priority'], observed=True).size().reset_index(name='Task Count')
     
-    priority_order = {'High': 0, 'Medium': 1, 'Low': 2}
-    grouped.sort_values(by='Task Priority', key=lambda x: x.map(priority_order).fillna(3), inplace=True)
+    # Task Priority is an ordered Categorical (High, Medium, Low, ...), so this sorts on its codes;
+    # stable keeps trainers in name order within each priority
+    grouped = grouped.sort_values(by='Task Priority', kind='stable')
     
     # Custom Strong Colors
     prio_colors = {'High': '#DC143C', 'Medium': '#FF8C00', 'Low': '#228B22'} 
@@ -117,20 +135,20 @@ def plot_priority_compliance(df, colors=None):
                  
     return fig
 
-def plot_activity_bubble(df, color_map=None):
+def plot_activity_bubble(df, color_map=None, totals=None):
     """
     Bubble Chart for Activity Breakdown.
     X = Activity Category, Y = Hours, Size = Hours.
+    Pass precomputed `totals` (see get_activity_totals) to skip the groupby.
     """
-    grouped = df.groupby('Activity Category')['Work Time (Mins)'].sum().reset_index()
-    grouped['Hours'] = (grouped['Work Time (Mins)'] / 60).round(1)
+    # Already sorted by hours descending for better visual
+    if totals is None:
+        totals = get_activity_totals(df)
+    grouped = totals.round({'Hours': 1}).reset_index()
     
-    # Sort for better visual
-    grouped = grouped.sort_values('Hours', ascending=False)
-    
-    # If no map provided, generate local one
+    # If no map provided, generate local one from the same totals
     if color_map is None:
-        color_map = get_activity_color_map(df)
+        color_map = get_activity_color_map(df, totals=totals)
     
     fig = px.scatter(grouped, x='Activity Category', y='Hours',
                      size='Hours', color='Activity Category',
@@ -2,6 +2,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+DAYS_ORDER = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Attendance code -> heatmap value (anything else maps to 5)
+STATUS_MAP = {'P': 1, 'L': 2, 'WO': 0, 'H': 3, 'A': 4}
+
 def plot_attendance_heatmap(df):
     """
     Heatmap of Present (P), Leave (L), WO.
@@ -14,11 +19,6 @@ def plot_attendance_heatmap(df):
     # Calendar Grid Heatmap
     # X-Axis = Week Number (or Start Date of Week), Y-Axis = Day of Week
     
-    # Ensure necessary columns
-    if 'Week' not in df.columns or 'DayOfWeek' not in df.columns:
-        df['Week'] = df['Date_Obj'].dt.isocalendar().week
-        df['DayOfWeek'] = df['Date_Obj'].dt.day_name()
-    
     # Filter unique daily status per employee (assuming single employee df passed usually, or avg? 
     # Usually this plot is for single trainer in Tab 5, but if passed multiple, it breaks.
     # The existing function grouping by ['Employee Name', 'Date_Obj'] suggests multiple support but heatmap requires 2D.
@@ -29,42 +29,19 @@ def plot_attendance_heatmap(df):
     
     att_df = df.groupby('Date_Obj').first().reset_index() # Take first entry per date if single trainer
     
-    # Map DayOfWeek to specific order for Y-axis
-    days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    att_df['Day_Num'] = att_df['Date_Obj'].dt.dayofweek
-    
     # Map Status
-    status_map = {'P': 1, 'L': 2, 'WO': 0, 'H': 3, 'A': 4} 
     # 0=WO(Gray), 1=P(Green), 2=L(Orange), 3=H(Blue), 4=A(Red)
+    att_df['Status_Val'] = att_df['Attendance'].str.strip().map(STATUS_MAP).fillna(5).astype('int8')
     
-    att_df['Status_Val'] = att_df['Attendance'].map(lambda x: status_map.get(str(x).strip(), 5))
-    
-    # Pivot for Heatmap: Index=DayOfWeek, Columns=Week
-    pivot_val = att_df.pivot(index='Day_Num', columns='Week', values='Status_Val')
-    pivot_text = att_df.pivot(index='Day_Num', columns='Week', values='Attendance')
-    
-    # Reindex to ensure all days present
-    pivot_val = pivot_val.reindex(range(7)).sort_index(ascending=False) # Mon at top or bottom? Standard is Mon top, but Heatmap y=0 is bottom.
-    pivot_text = pivot_text.reindex(range(7)).sort_index(ascending=False)
-    # Let's flip so Mon is at top
-    
-    # Actually, let's use explicit y array
-    y_labels = days_order[::-1] # Reverse so Monday is top
-    
-    # We need to map the pivot data correctly to these labels
-    # pivot_val index 0 is Monday. If we plot Y=[0..6], 0 is bottom. 
-    # So we want Mon (0) at Top (6).
+    # Pivot for Heatmap: Index=DayOfWeek (0=Mon .. 6=Sun, set by the loader), Columns=Week
+    pivot_val = att_df.pivot(index='DayOfWeek_Num', columns='Week', values='Status_Val')
+    pivot_text = att_df.pivot(index='DayOfWeek_Num', columns='Week', values='Attendance').astype(object)
     
-    # Let's construct data arrays directly for robustness
-    z_data = []
-    text_data = []
-    for day_idx in range(6, -1, -1): # 6(Sun) to 0(Mon)
-        if day_idx in pivot_val.index:
-            z_data.append(pivot_val.loc[day_idx].values)
-            text_data.append(pivot_text.loc[day_idx].fillna('').values)
-        else:
-            z_data.append([None]*len(pivot_val.columns))
-            text_data.append(['']*len(pivot_val.columns))
+    # Reindex to ensure all days present, ordered 6(Sun) to 0(Mon) so Monday is on top
+    # (Heatmap y=0 is the bottom row)
+    z_data = pivot_val.reindex(index=range(6, -1, -1)).to_numpy()
+    text_data = pivot_text.reindex(index=range(6, -1, -1)).fillna('').to_numpy()
+    y_labels = DAYS_ORDER[::-1]
             
     # Updated Colors for Heatmap (Stronger, No Pink/Grey/LightYellow)
     # WO=AliceBlue (#F0F8FF), P=ForestGreen (#228B22), L=DarkOrange (#FF8C00), H=RoyalBlue (#4169E1), A=FireBrick (#B22222)
@@ -103,12 +80,12 @@ def plot_attendance_heatmap(df):
 def plot_leave_rate(df, colors=None):
     # Count days marked 'L' vs total days
     # Aggregation per employee
-    att_df = df.groupby(['Employee Name', 'Date_Obj'])['Attendance'].first().reset_index()
+    att_df = df.groupby(['Employee Name', 'Date_Obj'], observed=True)['Attendance'].first().reset_index()
     
-    counts = att_df.groupby('Employee Name')['Attendance'].value_counts().unstack(fill_value=0)
+    counts = pd.crosstab(att_df['Employee Name'], att_df['Attendance'])
     
     if 'L' in counts.columns:
-        counts['Leave %'] = counts['L'] / counts.sum(axis=1) * 100
+        counts['Leave %'] = counts['L'].to_numpy() / counts.sum(axis=1).to_numpy() * 100
         counts.reset_index(inplace=True)
         
         fig = px.bar(counts, x='Employee Name', y='Leave %',
@@ -1,6 +1,15 @@
+import re
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
+# Broad category -> Activity Category pattern, first match wins (case-insensitive)
+BROAD_CATEGORY_PATTERNS = {
+    'Travel': re.compile(r'travel', re.IGNORECASE),
+    'Training': re.compile(r'training|session', re.IGNORECASE),
+    'Content Creation': re.compile(r'content', re.IGNORECASE),
+}
+
 def plot_location_performance(df, colors=None):
     """
     Side-by-side comparison of regions.
@@ -8,21 +17,11 @@ def plot_location_performance(df, colors=None):
     """
     # Aggregate data by Location and broadly categorized activity
     
-    def categorize(cat):
-        cat = str(cat).lower()
-        if 'travel' in cat:
-            return 'Travel'
-        elif 'training' in cat or 'session' in cat:
-            return 'Training'
-        elif 'content' in cat:
-            return 'Content Creation'
-        else:
-            return 'Other/Admin'
-            
-    df['Broad_Category'] = df['Activity Category'].apply(categorize)
+    categories = df['Activity Category']
+    masks = [categories.str.contains(pattern, na=False) for pattern in BROAD_CATEGORY_PATTERNS.values()]
+    broad = pd.Categorical(np.select(masks, list(BROAD_CATEGORY_PATTERNS), default='Other/Admin'))
     
-    grouped = df.groupby(['Location', 'Broad_Category'])['Work Time (Mins)'].sum().reset_index()
-    grouped['Hours'] = (grouped['Work Time (Mins)'] / 60).round(1)
+    grouped = df.assign(Broad_Category=broad).groupby(['Location', 'Broad_Category'], observed=True)['Hours'].sum().round(1).reset_index()
     
     fig = px.bar(grouped, x='Location', y='Hours', color='Broad_Category',
                  title="Regional Performance: Activity Distribution (Hours)",
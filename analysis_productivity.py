@@ -1,18 +1,44 @@
+import re
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+# Trainer profile keyword groups for Activity Category (case-insensitive)
+TRAINER_TRAINING_RE = re.compile(r'training|session|delivery|facilitation', re.IGNORECASE)
+TRAINER_TRAVEL_RE = re.compile(r'travel', re.IGNORECASE)
+
+def add_lollipop_stems(fig, x, y, color='lightgrey'):
+    """
+    Lollipop stems from 0 to each x for the matching y: one line trace with
+    segments separated by NaN gaps, drawn underneath the existing markers.
+    """
+    n = len(x)
+    fig.add_trace(go.Scatter(
+        x=np.column_stack([np.zeros(n), x, np.full(n, np.nan)]).ravel(),
+        y=np.repeat(np.asarray(y), 3),
+        mode='lines', line=dict(color=color, width=1),
+        showlegend=False, hoverinfo='skip'
+    ))
+    fig.data = fig.data[-1:] + fig.data[:-1]
+    return fig
+
 def get_productivity_summary(df):
     """
     Calculates total logged minutes and average daily minutes per trainer.
     """
-    # Total minutes
-    total_mins = df.groupby('Employee Name')['Work Time (Mins)'].sum().sort_values(ascending=False)
+    # Total minutes and active days in a single grouped pass
+    # Denominator: Unique days worked (where at least one task > 0 mins)
+    summary = df.assign(
+        active_date=df['Date'].where(df['Work Time (Mins)'] > 0)
+    ).groupby('Employee Name', observed=True, sort=False).agg(
+        total_mins=('Work Time (Mins)', 'sum'),
+        active_days=('active_date', 'nunique')
+    )
+    total_mins = summary['total_mins'].rename('Work Time (Mins)').sort_values(ascending=False)
     
     # Avg daily minutes
-    # Denominator: Unique days worked (where at least one task > 0 mins)
-    active_days = df[df['Work Time (Mins)'] > 0].groupby('Employee Name')['Date'].nunique()
-    avg_daily_mins = (total_mins / active_days).sort_values(ascending=False)
+    avg_daily_mins = (summary['total_mins'] / summary['active_days']).sort_values(ascending=False)
     
     return total_mins, avg_daily_mins
 
@@ -35,13 +61,7 @@ def plot_total_logged_minutes(total_mins, colors=None):
     fig.update_traces(marker_size=12, textposition='middle right')
     
     # Add lines for lollipop effect
-    for i, row in total_hours.iterrows():
-        fig.add_shape(
-            type='line',
-            x0=0, y0=row['Employee Name'],
-            x1=row['Hours'], y1=row['Employee Name'],
-            line=dict(color='lightgrey', width=1)
-        )
+    add_lollipop_stems(fig, total_hours['Hours'], total_hours['Employee Name'])
         
     fig.update_layout(
         yaxis_title=None, 
@@ -51,23 +71,53 @@ def plot_total_logged_minutes(total_mins, colors=None):
     )
     return fig
 
+def get_utilization_rate(df, capacity_mins=None):
+    """
+    Utilization % per trainer, sorted descending.
+    Billable / Capacity when capacity_mins is set, otherwise Billable / Total logged time.
+    """
+    totals = df.assign(
+        billable_mins=df['Work Time (Mins)'].where(df['Is_Billable'], 0)
+    ).groupby('Employee Name', observed=True).agg(
+        billable=('billable_mins', 'sum'),
+        total=('Work Time (Mins)', 'sum')
+    )
+    
+    if capacity_mins:
+        util = totals['billable'] / capacity_mins * 100
+    else:
+        util = (totals['billable'] / totals['total'] * 100).where(totals['total'] > 0, 0)
+    # Keyed groupby order plus a stable sort keeps tied trainers (e.g. 0%) in name order
+    return util.sort_values(ascending=False, kind='stable')
+
+def get_trainer_summary(df):
+    """
+    Total, training, travel and billable minutes per trainer (in order of first appearance).
+    Used by the Trainer 360 KPIs and the PDF trainer table.
+    """
+    categories = df['Activity Category']
+    mins = df['Work Time (Mins)']
+    return df.assign(
+        train_mins=mins.where(categories.str.contains(TRAINER_TRAINING_RE, na=False), 0),
+        travel_mins=mins.where(categories.str.contains(TRAINER_TRAVEL_RE, na=False), 0),
+        billable_mins=mins.where(df['Is_Billable'], 0)
+    ).groupby('Employee Name', observed=True, sort=False).agg(
+        total_mins=('Work Time (Mins)', 'sum'),
+        train_mins=('train_mins', 'sum'),
+        travel_mins=('travel_mins', 'sum'),
+        billable_mins=('billable_mins', 'sum')
+    )
+
 def plot_utilization_rate_lollipop(df, capacity_mins=None, colors=None):
     """
     Lollipop version - Real utilization rate (Billable / Capacity).
     """
+    grouped = get_utilization_rate(df, capacity_mins)
     if capacity_mins:
         # Utilization based on Capacity
-        grouped = df.groupby('Employee Name').apply(
-            lambda x: x[x['Is_Billable']]['Work Time (Mins)'].sum() / capacity_mins * 100,
-            include_groups=False
-        ).sort_values(ascending=False)
         title_text = f"Utilization Scorecard - Lollipop (Target: {capacity_mins/60:.1f} hrs)"
     else:
         # Old Logic
-        grouped = df.groupby('Employee Name').apply(
-            lambda x: x[x['Is_Billable']]['Work Time (Mins)'].sum() / x['Work Time (Mins)'].sum() * 100 if x['Work Time (Mins)'].sum() > 0 else 0,
-            include_groups=False
-        ).sort_values(ascending=False)
         title_text = "Utilization Rate - Lollipop (Billable Time %)"
     
     # Prepare DF for Plotly
@@ -75,19 +125,14 @@ def plot_utilization_rate_lollipop(df, capacity_mins=None, colors=None):
     
     fig = px.scatter(plot_df, x='Utilization %', y='Employee Name',
                      title=title_text,
-                     text=plot_df['Utilization %'].apply(lambda x: f"{x:.1f}%"),
+                     text=np.char.mod('%.1f%%', plot_df['Utilization %'].to_numpy()),
                      color='Utilization %',
                      color_continuous_scale='Teal')
     
     fig.update_traces(marker_size=12, textposition='middle right')
     
-    for i, row in plot_df.iterrows():
-        fig.add_shape(
-            type='line',
-            x0=0, y0=row['Employee Name'],
-            x1=row['Utilization %'], y1=row['Employee Name'],
-            line=dict(color='lightgrey', width=1)
-        )
+    # Add lines for lollipop effect
+    add_lollipop_stems(fig, plot_df['Utilization %'], plot_df['Employee Name'])
         
     fig.update_layout(
         yaxis_title=None, 
@@ -101,19 +146,12 @@ def plot_utilization_rate_scatter(df, capacity_mins=None, colors=None):
     """
     Scatter version (no lines) - Real utilization rate (Billable / Capacity).
     """
+    grouped = get_utilization_rate(df, capacity_mins)
     if capacity_mins:
         # Utilization based on Capacity
-        grouped = df.groupby('Employee Name').apply(
-            lambda x: x[x['Is_Billable']]['Work Time (Mins)'].sum() / capacity_mins * 100,
-            include_groups=False
-        ).sort_values(ascending=False)
         title_text = f"Utilization Scorecard - Scatter (Target: {capacity_mins/60:.1f} hrs)"
     else:
         # Old Logic
-        grouped = df.groupby('Employee Name').apply(
-            lambda x: x[x['Is_Billable']]['Work Time (Mins)'].sum() / x['Work Time (Mins)'].sum() * 100 if x['Work Time (Mins)'].sum() > 0 else 0,
-            include_groups=False
-        ).sort_values(ascending=False)
         title_text = "Utilization Rate - Scatter (Billable Time %)"
     
     # Prepare DF for Plotly
@@ -121,7 +159,7 @@ def plot_utilization_rate_scatter(df, capacity_mins=None, colors=None):
     
     fig = px.scatter(plot_df, x='Utilization %', y='Employee Name',
                      title=title_text,
-                     text=plot_df['Utilization %'].apply(lambda x: f"{x:.1f}%"),
+                     text=np.char.mod('%.1f%%', plot_df['Utilization %'].to_numpy()),
                      color='Utilization %',
                      color_continuous_scale='Teal')
     
@@ -144,12 +182,9 @@ def plot_billable_vs_non_billable(df, colors=None):
     """
     Stacked bar chart of Billable vs Non-Billable.
     """
-    grouped = df.groupby(['Employee Name', 'Is_Billable'])['Work Time (Mins)'].sum().reset_index()
+    grouped = df.groupby(['Employee Name', 'Is_Billable'], observed=True)['Hours'].sum().round(1).reset_index()
     grouped['Type'] = grouped['Is_Billable'].map({True: 'Billable (Training/Assessments)', False: 'Non-Billable (Admin/Travel/Mtgs)'})
     
-    # Convert to Hours
-    grouped['Hours'] = (grouped['Work Time (Mins)'] / 60).round(1)
-    
     fig = px.bar(grouped, x='Hours', y='Employee Name', color='Type', 
                  orientation='h', 
                  title="Billable vs Non-Billable Time Breakdown (Hours)",
@@ -164,7 +199,7 @@ def get_daily_avg_trend(df):
     Line chart of average minutes per day across all trainers (or filtered).
     """
     # Group by Date and Employee, calculate total mins/day per employee
-    daily_sums = df.groupby(['Date_Obj', 'Employee Name'])['Work Time (Mins)'].sum().reset_index()
+    daily_sums = df.groupby(['Date_Obj', 'Employee Name'], observed=True)['Work Time (Mins)'].sum().reset_index()
     # Average across employees for that day
     daily_system_avg = daily_sums.groupby('Date_Obj')['Work Time (Mins)'].mean().reset_index()
     
@@ -1,18 +1,28 @@
+import re
+import numpy as np
 import pandas as pd
 import plotly.express as px
+from analysis_productivity import add_lollipop_stems
+
+# Training related activities (case-insensitive)
+TRAIN_RE = re.compile(r'training|session|class', re.IGNORECASE)
+
+# Delivery mode patterns, checked in order (case-insensitive)
+ONLINE_RE = re.compile(r'online', re.IGNORECASE)
+OFFLINE_RE = re.compile(r'offline|onsite', re.IGNORECASE)
 
 def get_training_metrics(df):
     """
     Returns KPIs for Training execution.
     """
     # Filter for Training related activities
-    training_keywords = ['Training', 'Session', 'Class']
-    training_df = df[df['Activity Category'].astype(str).apply(lambda x: any(k.lower() in x.lower() for k in training_keywords))].copy()
+    is_training = df['Activity Category'].str.contains(TRAIN_RE, na=False)
+    training_df = df[is_training]
     
-    total_training_mins = training_df.groupby('Employee Name')['Work Time (Mins)'].sum().sort_values(ascending=False)
+    total_training_mins = training_df.groupby('Employee Name', observed=True, sort=False)['Work Time (Mins)'].sum().sort_values(ascending=False)
     
     # Sessions count (rows)
-    session_count = training_df.groupby('Employee Name').size().sort_values(ascending=False)
+    session_count = training_df.groupby('Employee Name', observed=True, sort=False).size().sort_values(ascending=False)
     
     return total_training_mins, session_count, training_df
 
@@ -34,13 +44,8 @@ def plot_training_leaderboard(total_training_mins, colors=None):
                      
     fig.update_traces(marker_size=12, textposition='middle right')
     
-    for i, row in total_hours.iterrows():
-        fig.add_shape(
-            type='line',
-            x0=0, y0=row['Employee Name'],
-            x1=row['Hours'], y1=row['Employee Name'],
-            line=dict(color='lightgrey', width=1)
-        )
+    # Add lines for lollipop effect
+    add_lollipop_stems(fig, total_hours['Hours'], total_hours['Employee Name'])
         
     fig.update_layout(yaxis_title=None, xaxis_title="Training Hours", showlegend=False, margin=dict(l=20, r=20, t=40, b=20))
     return fig
@@ -49,19 +54,13 @@ def plot_online_vs_offline(training_df, colors=None):
     """
     Donut chart of Online vs Offline.
     """
-    def categorize_mode(cat):
-        cat = str(cat).lower()
-        if 'online' in cat:
-            return 'Online'
-        elif 'offline' in cat or 'onsite' in cat:
-            return 'Offline'
-        return 'Other'
-        
-    training_df['Mode'] = training_df['Activity Category'].apply(categorize_mode)
+    # Local array: training_df is shared with other charts and must not be mutated
+    categories = training_df['Activity Category']
+    mode = np.where(categories.str.contains(ONLINE_RE, na=False), 'Online',
+                    np.where(categories.str.contains(OFFLINE_RE, na=False), 'Offline', 'Other'))
     
     # Filter out 'Other' if needed, or keep to catch edge cases
-    grouped = training_df[training_df['Mode'] != 'Other'].groupby(['Employee Name', 'Mode'])['Work Time (Mins)'].sum().reset_index()
-    grouped['Hours'] = (grouped['Work Time (Mins)'] / 60).round(1)
+    grouped = training_df.assign(Mode=mode)[mode != 'Other'].groupby(['Employee Name', 'Mode'], observed=True)['Hours'].sum().round(1).reset_index()
     
     fig = px.bar(grouped, x='Employee Name', y='Hours', color='Mode',
                  title="Session Delivery Mode (Online vs Offline)",
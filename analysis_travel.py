@@ -1,5 +1,11 @@
+import re
 import pandas as pd
 import plotly.express as px
+from analysis_training import TRAIN_RE, ONLINE_RE
+
+# Activity Category keyword patterns (case-insensitive); the Training and Online
+# patterns are shared with the Training tab so both classify activities alike
+TRAVEL_RE = re.compile(r'travel', re.IGNORECASE)
 
 def analyze_travel_efficiency(df, colors=None):
     """
@@ -7,36 +13,25 @@ def analyze_travel_efficiency(df, colors=None):
     Excludes Online delivery from the Y-axis.
     Bubble Size = Total Worked Days.
     """
-    # Identify Travel
-    travel_keywords = ['Travel', 'Travelling']
-    training_keywords = ['Training', 'Session', 'Class']
-    
-    def is_travel(cat):
-        return any(k.lower() in str(cat).lower() for k in travel_keywords)
-        
-    def is_onsite_delivery(cat):
-        # Must be training AND NOT Online
-        cat_str = str(cat).lower()
-        is_tr = any(k.lower() in cat_str for k in training_keywords)
-        is_online = 'online' in cat_str
-        return is_tr and not is_online
-    
-    # Calculate totals per employee
-    grouped = df.groupby('Employee Name').apply(
-        lambda x: pd.Series({
-            'Travel Mins': x[x['Activity Category'].apply(is_travel)]['Work Time (Mins)'].sum(),
-            'Delivery Mins': x[x['Activity Category'].apply(is_onsite_delivery)]['Work Time (Mins)'].sum(),
-            'Total Worked Days': x['Date_Obj'].nunique() if 'Date_Obj' in x.columns else x['Date'].nunique()
-        })
-    ).reset_index()
+    # Identify Travel and Onsite Delivery (Training AND NOT Online) once for the whole frame
+    categories = df['Activity Category']
+    is_travel = categories.str.contains(TRAVEL_RE, na=False)
+    is_onsite = categories.str.contains(TRAIN_RE, na=False) & ~categories.str.contains(ONLINE_RE, na=False)
     
-    # Convert to Hours
-    grouped['Travel Hours'] = (grouped['Travel Mins'] / 60).round(1)
-    grouped['Delivery Hours'] = (grouped['Delivery Mins'] / 60).round(1)
+    # Calculate totals per employee in a single grouped aggregation
+    days_col = 'Date_Obj' if 'Date_Obj' in df.columns else 'Date'
+    grouped = df.assign(
+        travel_hours=df['Hours'].where(is_travel, 0),
+        delivery_hours=df['Hours'].where(is_onsite, 0)
+    ).groupby('Employee Name', observed=True).agg(**{
+        'Travel Hours': ('travel_hours', 'sum'),
+        'Delivery Hours': ('delivery_hours', 'sum'),
+        'Total Worked Days': (days_col, 'nunique')
+    }).round({'Travel Hours': 1, 'Delivery Hours': 1}).reset_index()
     
     # Calculate Efficiency % (Delivery / (Delivery + Travel))
     grouped['Total Mobile Hours'] = grouped['Travel Hours'] + grouped['Delivery Hours']
-    grouped['Efficiency'] = grouped.apply(lambda x: (x['Delivery Hours'] / x['Total Mobile Hours'] * 100) if x['Total Mobile Hours'] > 0 else 0, axis=1).round(1)
+    grouped['Efficiency'] = (grouped['Delivery Hours'] / grouped['Total Mobile Hours'] * 100).where(grouped['Total Mobile Hours'] > 0, 0).round(1)
     grouped['Eff. Label'] = grouped['Efficiency'].astype(str) + "%"
 
     # Scatter plot
@@ -53,11 +48,10 @@ def analyze_travel_efficiency(df, colors=None):
     return fig
 
 def plot_travel_bar(df, colors=None):
-    travel_keywords = ['Travel', 'Travelling']
-    travel_df = df[df['Activity Category'].apply(lambda x: any(k.lower() in str(x).lower() for k in travel_keywords))]
+    is_travel = df['Activity Category'].str.contains(TRAVEL_RE, na=False)
+    travel_df = df[is_travel]
     
-    grouped = travel_df.groupby('Employee Name')['Work Time (Mins)'].sum().sort_values(ascending=False).reset_index()
-    grouped['Hours'] = (grouped['Work Time (Mins)'] / 60).round(1)
+    grouped = travel_df.groupby('Employee Name', observed=True, sort=False)['Hours'].sum().sort_values(ascending=False).round(1).reset_index()
     
     fig = px.bar(grouped, x='Hours', y='Employee Name', orientation='h',
                  title="Total Mobility/Travel by Trainer (Hours)",
@@ -1,28 +1,29 @@
+import re
 import pandas as pd
 import plotly.express as px
 
+# Weekly heatmap rows and the Activity Category pattern that feeds each (case-insensitive)
+WEEKLY_CATEGORY_PATTERNS = {
+    'Training': re.compile(r'training', re.IGNORECASE),
+    'Travel': re.compile(r'travel', re.IGNORECASE),
+    'Content': re.compile(r'content', re.IGNORECASE),
+    'Admin/Other': re.compile(r'other|mis', re.IGNORECASE),
+}
+
 def get_weekly_summary(df, colors=None):
     """
     Weekly Trends for Dashboard.
     """
-    df['Week_Num'] = df['Date_Obj'].dt.isocalendar().week
-    
-    def check_cat(x, key):
-        return key.lower() in str(x).lower()
-        
-    trends = df.groupby('Week_Num').apply(
-        lambda x: pd.Series({
-            'Training': x[x['Activity Category'].apply(lambda c: check_cat(c, 'Training'))]['Work Time (Mins)'].sum() / 60,
-            'Travel': x[x['Activity Category'].apply(lambda c: check_cat(c, 'Travel'))]['Work Time (Mins)'].sum() / 60,
-            'Content': x[x['Activity Category'].apply(lambda c: check_cat(c, 'Content'))]['Work Time (Mins)'].sum() / 60,
-            'Admin/Other': x[x['Activity Category'].apply(lambda c: check_cat(c, 'Other') or check_cat(c, 'MIS'))]['Work Time (Mins)'].sum() / 60
-        }),
-        include_groups=False
-    ).reset_index()
-    
+    # One masked hours column per heatmap row, then a single grouped sum
+    categories = df['Activity Category']
+    category_hours = {
+        name: df['Hours'].where(categories.str.contains(pattern, na=False), 0)
+        for name, pattern in WEEKLY_CATEGORY_PATTERNS.items()
+    }
+    trends = df.assign(**category_hours).groupby('Week')[list(WEEKLY_CATEGORY_PATTERNS)].sum().reset_index()
     
     # Reshape data for heatmap (categories as rows, weeks as columns)
-    heatmap_data = trends.set_index('Week_Num')[['Training', 'Travel', 'Content', 'Admin/Other']].T
+    heatmap_data = trends.set_index('Week')[['Training', 'Travel', 'Content', 'Admin/Other']].T
     
     # Create heatmap
     import plotly.graph_objects as go
@@ -62,13 +63,11 @@ def detect_anomalies(df):
     2. Zero minute entries with descriptions (Data Quality).
     """
     # 1. Low Productivity Days
-    daily_sums = df.groupby(['Employee Name', 'Date', 'Date_Obj'])['Work Time (Mins)'].sum().reset_index()
-    low_prod = daily_sums[daily_sums['Work Time (Mins)'] < 180].copy()
-    low_prod['Flag'] = 'Low Productivity (< 3 hrs)'
+    daily_sums = df.groupby(['Employee Name', 'Date', 'Date_Obj'], observed=True)['Work Time (Mins)'].sum().reset_index()
+    low_prod = daily_sums[daily_sums['Work Time (Mins)'] < 180].assign(Flag='Low Productivity (< 3 hrs)')
     
     # 2. Zero min entries with Desc
-    zero_mins = df[(df['Work Time (Mins)'] == 0) & (df['Description'].str.len() > 5)].copy()
-    zero_mins['Flag'] = 'Zero Mins Logged'
+    zero_mins = df[(df['Work Time (Mins)'] == 0) & (df['Description'].str.len() > 5)].assign(Flag='Zero Mins Logged')
     
     # Combine
     anomalies = pd.concat([
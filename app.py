@@ -1,7 +1,10 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from datetime import datetime
+from functools import partial
 import data_processor
 import analysis_productivity
 import analysis_activities
@@ -10,7 +13,6 @@ import analysis_travel
 import analysis_location
 import analysis_attendance
 import analysis_trends
-import pdf_generator
 
 # Page Config
 st.set_page_config(page_title="Team Productivity & Insights", layout="wide", page_icon="📊")
@@ -33,6 +35,142 @@ st.markdown("""
 def load_data(file):
     return data_processor.load_and_clean_data(file)
 
+@st.cache_data
+def get_date_bounds(_df, data_key):
+    """
+    (first, last) date in the loaded file, or None if no date parsed.
+    `data_key` (the uploaded file id) keys the cache.
+    """
+    first, last = _df['Date_Obj'].min(), _df['Date_Obj'].max()
+    if pd.isna(first):
+        return None
+    return first.date(), last.date()
+
+def category_mask(values, selected):
+    """
+    Boolean array: rows of the Categorical `values` whose label is in `selected`.
+    Matches on category codes; unknown labels (-1, same code as NaN) are dropped.
+    """
+    codes = values.cat.categories.get_indexer(list(selected))
+    return np.isin(values.cat.codes.to_numpy(), codes[codes >= 0])
+
+def filter_data(df, start_date, end_date, locations, employees):
+    """
+    Date range / Location / Trainer filter. Not cached: the mask is cheaper than
+    unpickling a cached copy of the filtered frame.
+    """
+    # Compare on datetime64 directly (end date inclusive) rather than per-row date objects
+    date_values = df['Date_Obj'].to_numpy()
+    start_ts = pd.Timestamp(start_date).to_datetime64()
+    end_ts = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).to_datetime64()
+    mask = (date_values >= start_ts) & (date_values < end_ts)
+    
+    if locations:
+        mask &= category_mask(df['Location'], locations)
+    if employees:
+        mask &= category_mask(df['Employee Name'], employees)
+    
+    return df[mask]
+
+@st.cache_data(max_entries=32)
+def compute_all_metrics(_df_filtered, filter_sig):
+    """
+    Executive KPIs plus the per-trainer minute and attendance-day summary for one filter selection
+    (`filter_sig` keys the cache; `_df_filtered` is not hashed).
+    """
+    trainer_summary = analysis_productivity.get_trainer_summary(_df_filtered)
+    
+    # Distinct days per trainer, overall and per Attendance code ('L' leave, 'P' present; case-insensitive)
+    att_days = _df_filtered.pivot_table(
+        index='Employee Name', columns=_df_filtered['Attendance'].str.upper(),
+        values='Date_Obj', aggfunc='nunique', fill_value=0, observed=True
+    ).reindex(index=trainer_summary.index, columns=['L', 'P'], fill_value=0)
+    trainer_summary = trainer_summary.assign(
+        total_days=_df_filtered.groupby('Employee Name', observed=True, sort=False)['Date_Obj'].nunique(),
+        leave_days=att_days['L'],
+        present_days=att_days['P']
+    )
+    
+    total_hours = trainer_summary['total_mins'].sum() / 60
+    # Training hours follow the Training tab's definition (analysis_training.TRAIN_RE)
+    is_training = _df_filtered['Activity Category'].str.contains(analysis_training.TRAIN_RE, na=False)
+    training_hours = _df_filtered['Work Time (Mins)'].where(is_training, 0).sum() / 60
+    metrics = {
+        'total_hours': total_hours,
+        'training_hours': training_hours,
+        'active_trainers': len(trainer_summary),
+        'avg_utilization': (training_hours / total_hours * 100) if total_hours > 0 else 0
+    }
+    return metrics, trainer_summary
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_pdf_report(report_key, _metrics, _charts, _config):
+    """
+    PDF bytes for one report. `report_key` covers the filter selection and every
+    sidebar option feeding the report, so the unhashed inputs are implied by it.
+    """
+    # reportlab is only needed once a report is requested
+    import pdf_generator
+    
+    # Charts are rasterized inside create_timesheet_report
+    return pdf_generator.create_timesheet_report(
+        df=None,  # Pass tables separately now
+        metrics=_metrics,
+        charts=_charts,
+        config=_config
+    ).getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_anomalies(_df_filtered, filter_sig):
+    """
+    Anomaly flags for one filter selection; the trainer multiselect then only
+    slices this result.
+    """
+    return analysis_trends.detect_anomalies(_df_filtered)
+
+def to_csv_bytes(df):
+    """
+    CSV export through Arrow's C++ writer. Date_Obj only holds whole days,
+    so it is written as a plain date.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if 'Date_Obj' in table.column_names:
+        idx = table.column_names.index('Date_Obj')
+        table = table.set_column(idx, 'Date_Obj', table['Date_Obj'].cast(pa.date32()))
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(table, sink)
+    return sink.getvalue().to_pybytes()
+
+@st.cache_data(show_spinner=False)
+def activity_color_map_for(ranked_categories):
+    """
+    Activity color map for a tuple of categories ranked by hours; cached per ranking.
+    """
+    return analysis_activities.build_activity_color_map(ranked_categories)
+
+# Chart builders served through cached_chart, by name
+CHART_BUILDERS = {
+    'utilization': analysis_productivity.plot_utilization_rate_lollipop,
+    'activity_treemap': analysis_activities.plot_activity_treemap,
+    'weekly_trends': analysis_trends.get_weekly_summary,
+    'billable': analysis_productivity.plot_billable_vs_non_billable,
+    'total_logged': analysis_productivity.plot_total_logged_minutes,
+    'activity_stacked': analysis_activities.plot_activity_stacked_bar,
+    'training_leaderboard': analysis_training.plot_training_leaderboard,
+    'online_offline': analysis_training.plot_online_vs_offline,
+    'travel_efficiency': analysis_travel.analyze_travel_efficiency,
+    'location_performance': analysis_location.plot_location_performance,
+}
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_chart(filter_sig, chart, _data, **params):
+    """
+    CHART_BUILDERS[chart](_data, **params), cached per filter selection so the
+    Tabs and the PDF export share one figure. `_data` is not hashed and must be
+    derived from the frame identified by `filter_sig`.
+    """
+    return CHART_BUILDERS[chart](_data, **params)
+
 # Sidebar - File Upload
 st.sidebar.header("📁 Upload Data")
 uploaded_file = st.sidebar.file_uploader("Upload Timesheet CSV", type=['csv'], help="Upload your timesheet CSV file to begin analysis")
@@ -108,12 +246,12 @@ else:
 st.sidebar.divider()
 st.sidebar.header("🔍 Filters")
 
-dates = sorted(df['Date_Obj'].dropna().unique())
-if not dates:
+date_bounds = get_date_bounds(df, uploaded_file.file_id)
+if date_bounds is None:
     st.error("No valid dates found in data.")
     st.stop()
     
-min_date, max_date = dates[0], dates[-1]
+min_date, max_date = date_bounds
 
 start_date, end_date = st.sidebar.date_input(
     "Date Range",
@@ -122,10 +260,11 @@ start_date, end_date = st.sidebar.date_input(
     max_value=max_date
 )
 
-locations = sorted(df['Location'].dropna().unique())
+# Categorical columns: categories are the sorted unique values of the loaded file
+locations = list(df['Location'].cat.categories)
 sel_locations = st.sidebar.multiselect("Select Location", locations, default=locations)
 
-employees = sorted(df['Employee Name'].dropna().unique())
+employees = list(df['Employee Name'].cat.categories)
 sel_employees = st.sidebar.multiselect("Select Trainers", employees, default=employees)
 
 st.sidebar.divider()
@@ -172,7 +311,6 @@ include_travel_efficiency = st.sidebar.checkbox("Travel Efficiency Chart", value
 include_location_performance = st.sidebar.checkbox("Location Performance Chart", value=False)
 
 # Global Color Theme
-pastel_colors = px.colors.qualitative.Bold 
 cust_pastel = ['#008B8B', '#4169E1', '#228B22', '#DAA520', '#800080', '#CC5500', '#20B2AA', '#4682B4', '#556B2F']
 
 state_params = {
@@ -183,29 +321,32 @@ state_params = {
 }
 
 # Filter by Date and Selections
-df_filtered = df[(df['Date_Obj'].dt.date >= start_date) & (df['Date_Obj'].dt.date <= end_date)]
-
-if sel_locations:
-    df_filtered = df_filtered[df_filtered['Location'].isin(sel_locations)]
-
-if sel_employees:
-    df_filtered = df_filtered[df_filtered['Employee Name'].isin(sel_employees)]
+# filter_sig identifies df_filtered for the per-selection caches below
+filter_sig = (uploaded_file.file_id, start_date, end_date, tuple(sel_locations), tuple(sel_employees))
+df_filtered = filter_data(df, start_date, end_date, sel_locations, sel_employees)
 
 if df_filtered.empty:
     st.warning("No data matches the selected filters.")
     st.stop()
 
+# Hours per Activity Category and the Consistent Color Map built from them
+# (shared by PDF export and all tabs)
+activity_totals = analysis_activities.get_activity_totals(df_filtered)
+activity_color_map = activity_color_map_for(tuple(activity_totals.index))
+
+# Executive KPIs and per-trainer minute totals (Tab 1, Trainer 360 and the PDF export)
+exec_metrics, trainer_summary = compute_all_metrics(df_filtered, filter_sig)
+total_hours = exec_metrics['total_hours']
+training_hours = exec_metrics['training_hours']
+active_trainers = exec_metrics['active_trainers']
+avg_utilization = exec_metrics['avg_utilization']
+
 # PDF Generation Button
 st.sidebar.divider()
 if st.sidebar.button("📥 Generate PDF Report", type="primary", use_container_width=True):
     with st.spinner("Generating PDF Report..."):
         try:
             # Collect metrics
-            total_hours = df_filtered['Work Time (Mins)'].sum() / 60
-            training_hours = analysis_training.get_training_metrics(df_filtered)[0].sum() / 60
-            active_trainers = df_filtered['Employee Name'].nunique()
-            avg_utilization = (training_hours / total_hours * 100) if total_hours > 0 else 0
-            
             metrics = {
                 'Total Logged Hours': f"{total_hours:,.1f} h",
                 'Total Training Hours': f"{training_hours:,.1f} h",
@@ -218,40 +359,39 @@ if st.sidebar.button("📥 Generate PDF Report", type="primary", use_container_w
             
             # Collect charts based on checkbox selections
             charts = []
-            activity_color_map = analysis_activities.get_activity_color_map(df_filtered)
             
             # Utilization chart
             if include_utilization_chart:
                 charts.append({
-                    'fig': analysis_productivity.plot_utilization_rate_lollipop(df_filtered, capacity_mins=state_params['capacity_mins'], colors=state_params['colors']),
+                    'fig': cached_chart(filter_sig, 'utilization', df_filtered, capacity_mins=state_params['capacity_mins'], colors=state_params['colors']),
                     'title': 'Utilization Score by Trainer'
                 })
             
             # Activity treemap
             if include_activity_treemap:
                 charts.append({
-                    'fig': analysis_activities.plot_activity_treemap(df_filtered, color_map=activity_color_map),
+                    'fig': cached_chart(filter_sig, 'activity_treemap', df_filtered, color_map=activity_color_map, totals=activity_totals),
                     'title': 'Time Investment by Activity'
                 })
             
             # Weekly trends
             if include_weekly_trends:
                 charts.append({
-                    'fig': analysis_trends.get_weekly_summary(df_filtered, colors=state_params['colors']),
+                    'fig': cached_chart(filter_sig, 'weekly_trends', df_filtered, colors=state_params['colors']),
                     'title': 'Weekly Work Trends'
                 })
             
             # Billable vs Non-billable
             if include_billable_chart:
                 charts.append({
-                    'fig': analysis_productivity.plot_billable_vs_non_billable(df_filtered, colors=state_params['colors']),
+                    'fig': cached_chart(filter_sig, 'billable', df_filtered, colors=state_params['colors']),
                     'title': 'Billable vs Non-Billable Hours'
                 })
             
             # Activity Stacked Bar
             if include_activity_stacked:
                 charts.append({
-                    'fig': analysis_activities.plot_activity_stacked_bar(df_filtered, color_map=activity_color_map),
+                    'fig': cached_chart(filter_sig, 'activity_stacked', df_filtered, color_map=activity_color_map),
                     'title': 'Activity Distribution by Trainer'
                 })
             
@@ -259,7 +399,7 @@ if st.sidebar.button("📥 Generate PDF Report", type="primary", use_container_w
             if include_training_leaderboard:
                 tr_mins, tr_sess, tr_df = analysis_training.get_training_metrics(df_filtered)
                 charts.append({
-                    'fig': analysis_training.plot_training_leaderboard(tr_mins, colors=state_params['colors']),
+                    'fig': cached_chart(filter_sig, 'training_leaderboard', tr_mins, colors=state_params['colors']),
                     'title': 'Training Hours Leaderboard'
                 })
             
@@ -267,21 +407,21 @@ if st.sidebar.button("📥 Generate PDF Report", type="primary", use_container_w
             if include_online_offline:
                 tr_mins, tr_sess, tr_df = analysis_training.get_training_metrics(df_filtered)
                 charts.append({
-                    'fig': analysis_training.plot_online_vs_offline(tr_df, colors=state_params['colors']),
+                    'fig': cached_chart(filter_sig, 'online_offline', tr_df, colors=state_params['colors']),
                     'title': 'Online vs Offline Training'
                 })
             
             # Travel Efficiency
             if include_travel_efficiency:
                 charts.append({
-                    'fig': analysis_travel.analyze_travel_efficiency(df_filtered, colors=state_params['colors']),
+                    'fig': cached_chart(filter_sig, 'travel_efficiency', df_filtered, colors=state_params['colors']),
                     'title': 'Travel Efficiency Analysis'
                 })
             
             # Location Performance
             if include_location_performance:
                 charts.append({
-                    'fig': analysis_location.plot_location_performance(df_filtered, colors=state_params['colors']),
+                    'fig': cached_chart(filter_sig, 'location_performance', df_filtered, colors=state_params['colors']),
                     'title': 'Performance by Location'
                 })
             
@@ -304,18 +444,12 @@ if st.sidebar.button("📥 Generate PDF Report", type="primary", use_container_w
             if include_trainer_table:
                 # Create trainer performance summary
                 trainer_stats = []
-                for trainer in df_filtered['Employee Name'].unique():
-                    trainer_df = df_filtered[df_filtered['Employee Name'] == trainer]
-                    total_mins = trainer_df['Work Time (Mins)'].sum()
-                    
-                    # Training hours
-                    training_keywords = ['Training', 'Session', 'Delivery', 'Facilitation']
-                    train_mins = trainer_df[trainer_df['Activity Category'].apply(
-                        lambda x: any(k.lower() in str(x).lower() for k in training_keywords)
-                    )]['Work Time (Mins)'].sum()
-                    
-                    # Billable hours
-                    billable_mins = trainer_df[trainer_df['Is_Billable']]['Work Time (Mins)'].sum()
+                # trainer_summary is already one row per trainer, in order of first appearance
+                for stats in trainer_summary.itertuples():
+                    trainer = stats.Index
+                    total_mins = stats.total_mins
+                    train_mins = stats.train_mins
+                    billable_mins = stats.billable_mins
                     
                     # Utilization
                     capacity_mins = state_params['capacity_mins']
@@ -353,22 +487,32 @@ if st.sidebar.button("📥 Generate PDF Report", type="primary", use_container_w
                     'title': 'Raw Timesheet Data'
                 })
             
+            # Cover timestamp, shown to the minute; part of the report key so a cached
+            # PDF is only reused while its "Generated on" time is still current
+            generated_at = datetime.now().replace(second=0, microsecond=0)
+            
             # Configure report
             pdf_config = {
                 'page_size': page_size,
                 'orientation': page_orientation,
                 'include_cover': include_cover,
-                'tables': tables_to_include
+                'tables': tables_to_include,
+                'generated_at': generated_at
             }
                 
-            # Generate PDF
-            pdf_buffer = pdf_generator.create_timesheet_report(
-                df=None,  # Pass tables separately now
-                metrics=metrics,
-                charts=charts,
-                config=pdf_config
+            # Everything that shapes the report; repeat clicks with the same key reuse the PDF
+            report_key = (
+                filter_sig, page_size, page_orientation, include_cover,
+                include_raw_data, include_summary_table, include_trainer_table,
+                include_utilization_chart, include_activity_treemap, include_weekly_trends,
+                include_billable_chart, include_activity_stacked, include_training_leaderboard,
+                include_online_offline, include_travel_efficiency, include_location_performance,
+                state_params['capacity_mins'], generated_at
             )
             
+            # Generate PDF
+            pdf_buffer = build_pdf_report(report_key, metrics, charts, pdf_config)
+            
             # Download button
             st.sidebar.download_button(
                 label="⬇️ Download PDF",
@@ -399,10 +543,6 @@ with tab1:
     
     # Top Metrics
     c1, c2, c3, c4 = st.columns(4)
-    total_hours = df_filtered['Work Time (Mins)'].sum() / 60
-    training_hours = analysis_training.get_training_metrics(df_filtered)[0].sum() / 60
-    active_trainers = df_filtered['Employee Name'].nunique()
-    avg_utilization = (training_hours / total_hours * 100) if total_hours > 0 else 0
     
     # Calculate Capacity/Target
     target_hours_person = state_params['capacity_mins'] / 60 if state_params['capacity_mins'] else 0
@@ -424,25 +564,22 @@ with tab1:
     
     # Utilization Scorecard
     st.subheader("Leaderboard: Utilization Score")
-    st.plotly_chart(analysis_productivity.plot_utilization_rate_lollipop(df_filtered, capacity_mins=state_params['capacity_mins'], colors=state_params['colors']), use_container_width=True, key="tab1_util")
+    st.plotly_chart(cached_chart(filter_sig, 'utilization', df_filtered, capacity_mins=state_params['capacity_mins'], colors=state_params['colors']), use_container_width=True, key="tab1_util")
     
     
     st.divider()
     
     st.divider()
     
-    # Generate Consistent Color Map for Activity Plots
-    activity_color_map = analysis_activities.get_activity_color_map(df_filtered)
-    
     # Treemap (Activity Distribution)
     st.subheader("Total Time Investment by Activity")
-    st.plotly_chart(analysis_activities.plot_activity_treemap(df_filtered, color_map=activity_color_map), use_container_width=True, key="tab1_tree")
+    st.plotly_chart(cached_chart(filter_sig, 'activity_treemap', df_filtered, color_map=activity_color_map, totals=activity_totals), use_container_width=True, key="tab1_tree")
     
     st.divider()
     
     # Consolidated High-Level View
     st.subheader("Weekly Work Trends")
-    fig_trend = analysis_trends.get_weekly_summary(df_filtered, colors=state_params['colors'])
+    fig_trend = cached_chart(filter_sig, 'weekly_trends', df_filtered, colors=state_params['colors'])
     st.plotly_chart(fig_trend, use_container_width=True, key="tab1_trend")
 
 # --- TAB 2: DEEP DIVE ANALYSIS (Consolidated) ---
@@ -458,10 +595,10 @@ with tab2:
     c1, c2 = st.columns(2)
     with c1:
         # Fixed total_mins scope issue
-        total_mins_series = df_filtered.groupby('Employee Name')['Work Time (Mins)'].sum().sort_values(ascending=False)
-        st.plotly_chart(analysis_productivity.plot_total_logged_minutes(total_mins_series, colors=state_params['colors']), use_container_width=True, key="tab2_focus")
+        total_mins_series = df_filtered.groupby('Employee Name', observed=True, sort=False)['Work Time (Mins)'].sum().sort_values(ascending=False)
+        st.plotly_chart(cached_chart(filter_sig, 'total_logged', total_mins_series, colors=state_params['colors']), use_container_width=True, key="tab2_focus")
     with c2:
-        st.plotly_chart(analysis_productivity.plot_billable_vs_non_billable(df_filtered, colors=state_params['colors']), use_container_width=True, key="tab2_billable")
+        st.plotly_chart(cached_chart(filter_sig, 'billable', df_filtered, colors=state_params['colors']), use_container_width=True, key="tab2_billable")
         
     st.divider()
     
@@ -469,14 +606,14 @@ with tab2:
     st.info("### 2️⃣ Training & Activity Breakdown")
     
     st.caption("Activity Distribution (Hours)")
-    st.plotly_chart(analysis_activities.plot_activity_stacked_bar(df_filtered, color_map=activity_color_map), use_container_width=True, key="tab3_stacked")
+    st.plotly_chart(cached_chart(filter_sig, 'activity_stacked', df_filtered, color_map=activity_color_map), use_container_width=True, key="tab3_stacked")
 
     c3, c4 = st.columns(2)
     tr_mins, tr_sess, tr_df = analysis_training.get_training_metrics(df_filtered)
     with c3:
-        st.plotly_chart(analysis_training.plot_training_leaderboard(tr_mins, colors=state_params['colors']), use_container_width=True, key="tab3_leader")
+        st.plotly_chart(cached_chart(filter_sig, 'training_leaderboard', tr_mins, colors=state_params['colors']), use_container_width=True, key="tab3_leader")
     with c4:
-        st.plotly_chart(analysis_training.plot_online_vs_offline(tr_df, colors=state_params['colors']), use_container_width=True, key="tab3_mode")
+        st.plotly_chart(cached_chart(filter_sig, 'online_offline', tr_df, colors=state_params['colors']), use_container_width=True, key="tab3_mode")
     
     st.divider()
     
@@ -487,9 +624,9 @@ with tab2:
     
     c5, c6 = st.columns(2)
     with c5:
-        st.plotly_chart(analysis_travel.analyze_travel_efficiency(df_filtered, colors=state_params['colors']), use_container_width=True, key="tab4_eff")
+        st.plotly_chart(cached_chart(filter_sig, 'travel_efficiency', df_filtered, colors=state_params['colors']), use_container_width=True, key="tab4_eff")
     with c6:
-        st.plotly_chart(analysis_location.plot_location_performance(df_filtered, colors=state_params['colors']), use_container_width=True, key="tab4_loc")
+        st.plotly_chart(cached_chart(filter_sig, 'location_performance', df_filtered, colors=state_params['colors']), use_container_width=True, key="tab4_loc")
 
 # --- TAB 3: TRAINER 360 ---
 with tab3:
@@ -498,19 +635,15 @@ with tab3:
     selected_trainer = st.selectbox("Select Trainer Profile", employees)
     
     if selected_trainer:
-        trainer_df = df_filtered[df_filtered['Employee Name'] == selected_trainer].copy()
-        
-        # Calculate KPIs directly
-        total_mins = trainer_df['Work Time (Mins)'].sum()
-        training_keywords = ['Training', 'Session', 'Delivery', 'Facilitation']
-        travel_keywords = ['Travel', 'Travelling']
+        # One code mask on the filtered frame (empty if the trainer has no rows in the range)
+        trainer_df = df_filtered[category_mask(df_filtered['Employee Name'], [selected_trainer])]
         
-        def check_k(cat, keywords):
-            return any(k.lower() in str(cat).lower() for k in keywords)
-
-        train_mins = trainer_df[trainer_df['Activity Category'].apply(lambda x: check_k(x, training_keywords))]['Work Time (Mins)'].sum()
-        travel_mins = trainer_df[trainer_df['Activity Category'].apply(lambda x: check_k(x, travel_keywords))]['Work Time (Mins)'].sum()
-        billable_mins = trainer_df[trainer_df['Is_Billable']]['Work Time (Mins)'].sum()
+        # KPIs from the shared summary (zeros if the trainer has no rows in the filtered range)
+        stats = trainer_summary.reindex([selected_trainer], fill_value=0).iloc[0]
+        total_mins = stats['total_mins']
+        train_mins = stats['train_mins']
+        travel_mins = stats['travel_mins']
+        billable_mins = stats['billable_mins']
         
         # Calculate Utilization
         capacity_mins = state_params['capacity_mins']
@@ -521,14 +654,10 @@ with tab3:
             
         target_hours = capacity_mins / 60 if capacity_mins else 0
         
-        # Calculate Attendance Metrics (Presence vs Total Days)
-        total_days = trainer_df['Date_Obj'].nunique()
-        
-        # Count leave days - check for 'L' in Attendance column
-        leave_days = trainer_df[trainer_df['Attendance'].str.upper() == 'L']['Date_Obj'].nunique()
-        
-        # Count present days - check for 'P' in Attendance column
-        present_days = trainer_df[trainer_df['Attendance'].str.upper() == 'P']['Date_Obj'].nunique()
+        # Attendance Metrics (Presence vs Total Days), also from the shared summary
+        total_days = stats['total_days']
+        leave_days = stats['leave_days']
+        present_days = stats['present_days']
         
         # Calculate rates
         leave_rate = (leave_days / total_days * 100) if total_days > 0 else 0
@@ -562,12 +691,8 @@ with tab3:
 with tab4:
     st.header("Raw Data")
     
-    display_df = df_filtered.copy()
-    
-    # Enhance Data for Filtering
-    if 'Date_Obj' in display_df.columns:
-        display_df['Week'] = display_df['Date_Obj'].dt.isocalendar().week
-        display_df['DayOfWeek'] = display_df['Date_Obj'].dt.day_name()
+    # Week / DayOfWeek come from the loader; the filters below only slice, never write
+    display_df = df_filtered
     
     # Filter Columns
     fc1, fc2, fc3, fc4 = st.columns(4)
@@ -593,28 +718,34 @@ with tab4:
     with fc4:
         # DayOfWeek Filter
         if 'DayOfWeek' in display_df.columns:
-            days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            all_days = sorted(display_df['DayOfWeek'].unique(), key=lambda x: days_order.index(x) if x in days_order else 99)
+            # Ordered Categorical (Monday .. Sunday), so sorting follows the week
+            all_days = list(display_df['DayOfWeek'].unique().sort_values())
             sel_days = st.multiselect("Day Of Week", all_days)
         else:
             sel_days = []
             
-    # Apply Filters
-    if sel_emps:
-        display_df = display_df[display_df['Employee Name'].isin(sel_emps)]
-    if sel_cats:
-        display_df = display_df[display_df['Activity Category'].isin(sel_cats)]
-    if sel_weeks:
-        display_df = display_df[display_df['Week'].isin(sel_weeks)]
-    if sel_days:
-        display_df = display_df[display_df['DayOfWeek'].isin(sel_days)]
+    # Apply Filters as one combined mask
+    if sel_emps or sel_cats or sel_weeks or sel_days:
+        mask = np.ones(len(display_df), dtype=bool)
+        if sel_emps:
+            mask &= category_mask(display_df['Employee Name'], sel_emps)
+        if sel_cats:
+            mask &= category_mask(display_df['Activity Category'], sel_cats)
+        if sel_weeks:
+            mask &= display_df['Week'].isin(sel_weeks).to_numpy(dtype=bool, na_value=False)
+        if sel_days:
+            mask &= category_mask(display_df['DayOfWeek'], sel_days)
+        display_df = display_df[mask]
+    
+    # Chart helper columns (see data_processor.HELPER_COLUMNS) are not shown or exported
+    display_df = display_df.drop(columns=data_processor.HELPER_COLUMNS, errors='ignore')
         
     st.dataframe(display_df, use_container_width=True)
     
-    csv = display_df.to_csv(index=False).encode('utf-8')
+    # Encoded only when the button is clicked (Streamlit calls `data` on a worker thread)
     st.download_button(
         label="Download Cleaned Data as CSV",
-        data=csv,
+        data=partial(to_csv_bytes, display_df),
         file_name='cleaned_timesheet_data.csv',
         mime='text/csv',
     )
@@ -622,7 +753,7 @@ with tab4:
     st.divider()
     
     st.subheader("🚩 Red Flags & Anomalies")
-    anomalies = analysis_trends.detect_anomalies(df_filtered)
+    anomalies = cached_anomalies(df_filtered, filter_sig)
     if not anomalies.empty:
         # Filter by Trainer
         anom_trainers = sorted(anomalies['Employee Name'].unique())
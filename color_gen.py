@@ -1,44 +1,69 @@
 import plotly.express as px
-import colorsys
+import numpy as np
 import re
 
-def rgb_str_to_hsv(rgb_str):
-    # Parse "rgb(r, g, b)"
-    match = re.match(r'rgb\((\d+),\s*(\d+),\s*(\d+)\)', rgb_str)
-    if match:
-        r, g, b = map(int, match.groups())
-        return colorsys.rgb_to_hsv(r/255.0, g/255.0, b/255.0)
-    return (0, 0, 0)
+RGB_RE = re.compile(r'rgb\((\d+),\s*(\d+),\s*(\d+)\)')
 
-def hsv_to_hex(h, s, v):
-    r, g, b = colorsys.hsv_to_rgb(h, s, v)
-    return '#{:02x}{:02x}{:02x}'.format(int(r*255), int(g*255), int(b*255))
+def rgb_to_hsv(rgb):
+    """
+    (N, 3) array of RGB in 0-1 -> (N, 3) array of HSV (same formulas as colorsys).
+    """
+    r, g, b = rgb.T
+    maxc = rgb.max(axis=1)
+    rangec = maxc - rgb.min(axis=1)
+    grey = rangec == 0
+
+    # Grey pixels have no hue or saturation; divide by 1 there to avoid 0/0
+    safe_range = np.where(grey, 1.0, rangec)
+    rc = (maxc - r) / safe_range
+    gc = (maxc - g) / safe_range
+    bc = (maxc - b) / safe_range
+
+    h = np.select([r == maxc, g == maxc], [bc - gc, 2.0 + rc - bc], 4.0 + gc - rc)
+    h = np.where(grey, 0.0, (h / 6.0) % 1.0)
+    s = np.where(grey, 0.0, rangec / np.where(grey, 1.0, maxc))
+    return np.column_stack([h, s, maxc])
+
+def hsv_to_rgb(hsv):
+    """
+    (N, 3) array of HSV in 0-1 -> (N, 3) array of RGB (same formulas as colorsys).
+    """
+    h, s, v = hsv.T
+    i = np.floor(h * 6.0)
+    f = h * 6.0 - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+
+    # Hue sextant picks which of v/p/q/t feeds each channel
+    i = i.astype(int) % 6
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return np.column_stack([r, g, b])
 
 original_colors = px.colors.qualitative.Bold
-new_colors = []
 
 print(f"Original: {original_colors}")
 
-for c in original_colors:
-    if c.startswith('rgb'):
-        h, s, v = rgb_str_to_hsv(c)
-    else:
-        # Fallback if it is hex (though unlikely strictly for Bold)
-        continue
-        
-    # 1. Minimize saturation by 20%
-    s = max(0, s * 0.8)
-    
-    # 2. Check for Pink/Magenta and change it
-    # Hue usually runs 0-1. Pink/Magenta is around 0.8-0.95
-    # Red is around 0 or 1.
-    # 0.9 is Magenta/Pink
-    if 0.8 < h < 0.98: 
-        print(f"Replacing Pink hue: {h}")
-        h = 0.5 # Change to Cyan/Teal
-        
-    new_colors.append(hsv_to_hex(h, s, v))
+# Parse every "rgb(r, g, b)" entry in one pass into an (N, 3) array
+# (hex entries are skipped, though unlikely strictly for Bold)
+rgb = np.array(RGB_RE.findall(' '.join(original_colors)), dtype=float).reshape(-1, 3) / 255.0
+hsv = rgb_to_hsv(rgb)
+
+# 1. Minimize saturation by 20%
+hsv[:, 1] *= 0.8
+
+# 2. Check for Pink/Magenta and change it
+# Hue usually runs 0-1. Pink/Magenta is around 0.8-0.95
+# Red is around 0 or 1.
+# 0.9 is Magenta/Pink
+pink = (hsv[:, 0] > 0.8) & (hsv[:, 0] < 0.98)
+for h in hsv[pink, 0]:
+    print(f"Replacing Pink hue: {h}")
+hsv[pink, 0] = 0.5 # Change to Cyan/Teal
+
+new_colors = ['#{:02x}{:02x}{:02x}'.format(r, g, b) for r, g, b in (hsv_to_rgb(hsv) * 255).astype(int)]
 
 with open('colors.txt', 'w') as f:
     f.write(str(new_colors))
-
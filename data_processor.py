@@ -1,7 +1,48 @@
 import pandas as pd
 import numpy as np
 import re
-from datetime import datetime
+
+# Low-cardinality text columns stored as pandas Categoricals (grouped by integer codes;
+# .str methods on them run once per category and are mapped back by code)
+CATEGORICAL_COLUMNS = ['Employee Name', 'Activity Category', 'Location', 'Attendance', 'Month']
+
+# Activity Category keywords that make a task billable (case-insensitive)
+BILLABLE_RE = re.compile(r'training|assessment|content|development', re.IGNORECASE)
+
+# DayOfWeek is an ordered Categorical so it sorts Monday .. Sunday
+WEEKDAY_DTYPE = pd.CategoricalDtype(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], ordered=True)
+
+# Task Priority is an ordered Categorical so it sorts High > Medium > Low by code
+PRIORITY_ORDER = ['High', 'Medium', 'Low']
+
+# Derived columns used by the charts only, left out of the Raw Data view and CSV export
+HELPER_COLUMNS = ['Hours', 'DayOfWeek_Num']
+
+# Ordinal day suffixes ("1st" -> "1") in the raw date headers
+ORDINAL_RE = re.compile(r'(\d+)(st|nd|rd|th)')
+
+# Standardized task fields in each day block of the raw sheet
+TASK_FIELDS = ['Attendance_Status', 'Activity Category', 'Task Priority', 'Start Time', 'End Time', 'Work Time (Mins)', 'Description']
+
+# Raw sub-header keyword -> standardized task field, checked in order
+HEADER_FIELDS = {
+    'Attendance': 'Attendance_Status',
+    'Activity Category': 'Activity Category',
+    'Task Priority': 'Task Priority',
+    'Start': 'Start Time',
+    'End': 'End Time',
+    'Work Time': 'Work Time (Mins)',
+    'Mins': 'Work Time (Mins)',
+    'Description': 'Description',
+}
+
+def _is_blank(values):
+    """
+    True where a raw cell is empty: missing or whitespace only.
+    The nullable string dtype keeps NaN as <NA> rather than the text 'nan'.
+    """
+    text = values.astype('string').str.strip()
+    return text.isna().to_numpy() | (text == '').to_numpy(dtype=bool, na_value=False)
 
 def load_and_clean_data(file_path):
     """
@@ -10,7 +51,8 @@ def load_and_clean_data(file_path):
     try:
         # Load Raw Data: Rows 0 is metadata/empty, Row 1 is Dates, Row 2 is Headers
         # we will load with header=None to manually handle the structure
-        df_raw = pd.read_csv(file_path, header=None)
+        # Every cell is read as plain text (no type inference); blanks and NA markers are NaN
+        df_raw = pd.read_csv(file_path, header=None, dtype=str, engine='c')
     except Exception as e:
         return pd.DataFrame(), f"Error loading CSV: {e}"
 
@@ -30,16 +72,15 @@ def load_and_clean_data(file_path):
     # Actually, it's safer to extract the data rows and then ffill.
     
     try:
-        data = df_raw.iloc[data_start_idx:].copy()
-        data.reset_index(drop=True, inplace=True)
+        data = df_raw.iloc[data_start_idx:].reset_index(drop=True)
         
         # Column mapping based on inspection
         # C1: Employee Name, C2: Location
         # We need to forward fill these for purely empty rows that contain task data
         
         # Ensure 'Employee Name' (Col 1) is treated as NaN if empty string/whitespace
-        data[1] = data[1].replace(r'^\s*$', np.nan, regex=True)
-        data[2] = data[2].replace(r'^\s*$', np.nan, regex=True)
+        data[1] = data[1].where(data[1].str.strip() != '', np.nan)
+        data[2] = data[2].where(data[2].str.strip() != '', np.nan)
         
         data[1] = data[1].ffill()
         data[2] = data[2].ffill()
@@ -48,10 +89,9 @@ def load_and_clean_data(file_path):
         data = data.dropna(subset=[1])
         
         # Now iterate through date columns
-        dates_row = df_raw.iloc[date_row_idx]
-        headers_row = df_raw.iloc[header_row_idx]
-        
-        processed_rows = []
+        # (plain numpy arrays, so each cell is read without Series scalar access)
+        dates_arr = df_raw.iloc[date_row_idx].to_numpy()
+        headers_arr = df_raw.iloc[header_row_idx].to_numpy()
         
         # Identifying columns that start a Day block
         # We look for valid dates in dates_row
@@ -74,129 +114,87 @@ def load_and_clean_data(file_path):
         col_map = {}
         
         for c in range(7, total_cols):
-            val = str(dates_row[c]).strip()
+            val = str(dates_arr[c]).strip()
             if val and val.lower() != 'nan':
                  current_date_str = val
             
-            header_val = str(headers_row[c]).strip()
-            
-            # Map headers to standardized keys
-            if 'Attendance' in header_val:
-                field = 'Attendance_Status'
-            elif 'Activity Category' in header_val:
-                field = 'Activity Category'
-            elif 'Task Priority' in header_val:
-                field = 'Task Priority'
-            elif 'Start' in header_val:
-                field = 'Start Time'
-            elif 'End' in header_val:
-                field = 'End Time'
-            elif 'Work Time' in header_val or 'Mins' in header_val:
-                field = 'Work Time (Mins)'
-            elif 'Description' in header_val:
-                field = 'Description'
-            else:
-                field = None
+            # Map headers to standardized keys (first matching keyword wins)
+            header_val = str(headers_arr[c]).strip()
+            field = next((key for keyword, key in HEADER_FIELDS.items() if keyword in header_val), None)
             
             if current_date_str and field:
                 col_map[c] = (current_date_str, field)
         
-        # Now iterate through data rows and extract objects
-        # To optimize, we can pivot or stack, but row-by-row simple iteration is robust for jagged data
-        
-        for idx, row in data.iterrows():
-            emp_name = row[1]
-            location = row[2]
-            
-            # We need to bundle cells into task objects. 
-            # Since each day has multiple columns, we group by Date.
-            
-            # temporary storage for the row's tasks
-            # tasks_by_date = { 'Sat, Nov 01, 25': { 'Start Time': ..., 'End Time': ... } } 
-            
-            row_tasks = {}
-            
-            for col_idx, (date_str, field) in col_map.items():
-                cell_val = row[col_idx]
-                
-                if date_str not in row_tasks:
-                    row_tasks[date_str] = {}
-                
-                row_tasks[date_str][field] = cell_val
-                
-            # Now flatten row_tasks into the list
-            for date_str, task_data in row_tasks.items():
-                # Filter out empty tasks
-                # A task is valid if it has at least an Activity Category OR Description
-                # AND it's not fully NaN
-                
-                activity = str(task_data.get('Activity Category', '')).strip()
-                desc = str(task_data.get('Description', '')).strip()
-                
-                if (activity == '' or activity.lower() == 'nan') and (desc == '' or desc.lower() == 'nan'):
-                    continue
-                
-                entry = {
-                    'Employee Name': emp_name,
-                    'Location': location,
-                    'Date': date_str,
-                    'Attendance': task_data.get('Attendance_Status', np.nan),
-                    'Activity Category': task_data.get('Activity Category', np.nan),
-                    'Task Priority': task_data.get('Task Priority', np.nan),
-                    'Start Time': task_data.get('Start Time', np.nan),
-                    'End Time': task_data.get('End Time', np.nan),
-                    'Work Time (Mins)': task_data.get('Work Time (Mins)', 0),
-                    'Description': task_data.get('Description', ''),
-                }
-                processed_rows.append(entry)
-
-        df = pd.DataFrame(processed_rows)
+        # Reshape the day blocks instead of iterating rows: one column per (date, field)
+        # (the last column wins if a header repeats within a day), then stack the dates
+        block_cols = {key: c for c, key in col_map.items()}
+        block_dates = list(dict.fromkeys(date_str for date_str, _ in block_cols))
+        
+        tasks = data[list(block_cols.values())]
+        tasks.columns = pd.MultiIndex.from_tuples(list(block_cols), names=['Date', 'Field'])
+        tasks = tasks.reindex(columns=pd.MultiIndex.from_product([block_dates, TASK_FIELDS], names=['Date', 'Field']))
+        
+        # A day without a Description column gets '' (as a missing field always did)
+        for date_str in block_dates:
+            if (date_str, 'Description') not in block_cols:
+                tasks[(date_str, 'Description')] = ''
+        
+        tasks = tasks.stack(level='Date', future_stack=True).reset_index(level='Date')
+        
+        # Filter out empty tasks
+        # A task is valid if it has at least an Activity Category OR Description
+        keep = ~(_is_blank(tasks['Activity Category']) & _is_blank(tasks['Description']))
+        tasks = tasks[keep]
+        
+        df = pd.DataFrame({
+            'Employee Name': data[1].loc[tasks.index].to_numpy(),
+            'Location': data[2].loc[tasks.index].to_numpy(),
+            'Date': tasks['Date'].to_numpy(),
+            'Attendance': tasks['Attendance_Status'].to_numpy(),
+            'Activity Category': tasks['Activity Category'].to_numpy(),
+            'Task Priority': tasks['Task Priority'].to_numpy(),
+            'Start Time': tasks['Start Time'].to_numpy(),
+            'End Time': tasks['End Time'].to_numpy(),
+            'Work Time (Mins)': tasks['Work Time (Mins)'].to_numpy(),
+            'Description': tasks['Description'].to_numpy(),
+        }).infer_objects()
         
         # Post-Processing
         if df.empty:
             return df, "No data found."
 
         # Parse Date
-        # Data format example: "Sat, Nov 01, 25"
-        # We need to parse this to datetime
-        def parse_custom_date(d_str):
-            try:
-                # "Sat, Nov 01, 25" -> %a, %b %d, %y
-                clean_d = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', str(d_str)) # Remove ordinal if any
-                return datetime.strptime(clean_d, "%a, %b %d, %y")
-            except:
-                return pd.NaT
-
-        df['Date_Obj'] = df['Date'].apply(parse_custom_date)
+        # Data format example: "Sat, Nov 01, 25" -> %a, %b %d, %y
+        # Each distinct date string is parsed once (ordinal suffixes removed), then mapped back to the rows
+        unique_dates = pd.Series(df['Date'].unique())
+        clean_dates = unique_dates.astype(str).str.replace(ORDINAL_RE, r'\1', regex=True)
+        parsed_dates = pd.to_datetime(clean_dates, format="%a, %b %d, %y", errors='coerce')
+        df['Date_Obj'] = df['Date'].map(pd.Series(parsed_dates.to_numpy(), index=unique_dates))
         df['Month'] = df['Date_Obj'].dt.strftime('%B')
-        df['Week'] = df['Date_Obj'].dt.isocalendar().week
-        df['DayOfWeek'] = df['Date_Obj'].dt.day_name()
+        # Calendar parts derived once here; nullable ints because unparsed dates are NaT
+        df['Week'] = df['Date_Obj'].dt.isocalendar().week.astype('Int16')
+        df['DayOfWeek_Num'] = df['Date_Obj'].dt.dayofweek.astype('Int8')
+        df['DayOfWeek'] = df['Date_Obj'].dt.day_name().astype(WEEKDAY_DTYPE)
 
-        # Clean "Work Time (Mins)"
-        def clean_minutes(x):
-            try:
-                if pd.isna(x) or str(x).strip() == '':
-                    return 0
-                return float(str(x).replace(',', ''))
-            except:
-                return 0
+        # Clean "Work Time (Mins)": drop thousands separators; blank or unparseable -> 0
+        work_mins = df['Work Time (Mins)'].astype(str).str.replace(',', '', regex=False)
+        df['Work Time (Mins)'] = pd.to_numeric(work_mins, errors='coerce').astype('float64').fillna(0.0)
         
-        df['Work Time (Mins)'] = df['Work Time (Mins)'].apply(clean_minutes)
+        # Derived Column: Hours (pre-scaled so plots can aggregate it directly)
+        df['Hours'] = df['Work Time (Mins)'] / 60
 
+        for col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype('category')
+        
         # Derived Column: Is_Billable
         # Billable: "Training", "Assessment", "Content Development" (As per usage?)
         # User defined: "Training + Assessment = Billable; Meetings, Travel, Admin = Non-billable"
-        # We need to check category names.
+        # Matched on the Activity Category categories (see BILLABLE_RE)
+        df['Is_Billable'] = df['Activity Category'].str.contains(BILLABLE_RE, na=False)
         
-        billable_keywords = ['Training', 'Assessment', 'Content', 'Development']
-        
-        def check_billable(cat):
-            cat_str = str(cat).lower()
-            if any(k.lower() in cat_str for k in billable_keywords):
-                return True
-            return False
-            
-        df['Is_Billable'] = df['Activity Category'].apply(check_billable)
+        # Unexpected priority labels are kept, ordered after the known ones
+        extra_priorities = sorted(set(df['Task Priority'].dropna().astype(str)) - set(PRIORITY_ORDER))
+        df['Task Priority'] = df['Task Priority'].astype(pd.CategoricalDtype(PRIORITY_ORDER + extra_priorities, ordered=True))
         
         return df, None
         
@@ -11,6 +11,11 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
 import io
+import copy
+import hashlib
+import importlib.util
+import logging
+import threading
 import plotly.graph_objects as go
 import plotly.io as pio
 import pandas as pd
@@ -29,9 +34,86 @@ PAGE_SIZES = {
     'Legal': LEGAL
 }
 
+# (page size name, orientation) -> oriented page size, computed once
+ORIENTED_SIZES = (
+    {(name, 'Portrait'): portrait(size) for name, size in PAGE_SIZES.items()}
+    | {(name, 'Landscape'): landscape(size) for name, size in PAGE_SIZES.items()}
+)
+
+# Chart PNGs are rendered at this many pixels per inch of their box in the PDF
+CHART_DPI = 100
+
+# Without kaleido no chart can be rasterized, so rendering is skipped outright
+KALEIDO_AVAILABLE = importlib.util.find_spec('kaleido') is not None
+
+logger = logging.getLogger(__name__)
+
+# Rendered PNGs keyed by (SHA-1 of the figure JSON, width px, height px), so identical
+# figures (e.g. a report regenerated with other options) are rasterized once; oldest
+# evicted first. Shared by all Streamlit session threads, hence the lock.
+PNG_CACHE_SIZE = 128
+_png_cache = {}
+_png_cache_lock = threading.Lock()
+
+def _render_png(fig_json, width, height):
+    """
+    PNG bytes for a serialized Plotly figure, or None if image export fails
+    (the failure is logged; the report then shows the chart-unavailable note).
+    """
+    try:
+        return pio.to_image(pio.from_json(fig_json), format="png", width=width, height=height, engine="kaleido")
+    except Exception:
+        logger.exception("Chart image export failed")
+        return None
+
+def _store_png(key, png):
+    if png is None:
+        return
+    with _png_cache_lock:
+        if key not in _png_cache and len(_png_cache) >= PNG_CACHE_SIZE:
+            _png_cache.pop(next(iter(_png_cache)))
+        _png_cache[key] = png
+
+def render_chart_images(figs, width=6*inch, height=4*inch):
+    """
+    Rasterize Plotly figures to PNG bytes with kaleido, sized for a
+    width x height (points) image box. Figures not rendered before are
+    exported in-process, one after another.
+    Returns one entry per figure, None where image export is unavailable.
+    """
+    if not KALEIDO_AVAILABLE:
+        return [None] * len(figs)
+    
+    size = (int(width / inch * CHART_DPI), int(height / inch * CHART_DPI))
+    fig_jsons = [fig.to_json() for fig in figs]
+    keys = [(hashlib.sha1(fig_json.encode()).hexdigest(),) + size for fig_json in fig_jsons]
+    
+    # Export outside the lock (slow); a figure rendered twice concurrently is simply stored twice
+    pngs = {}
+    for key, fig_json in dict(zip(keys, fig_jsons)).items():
+        with _png_cache_lock:
+            png = _png_cache.get(key)
+        if png is None:
+            png = _render_png(fig_json, *size)
+            _store_png(key, png)
+        pngs[key] = png
+    
+    return [pngs[key] for key in keys]
+
+def render_chart_image(fig, width=6*inch, height=4*inch):
+    """
+    Rasterize one Plotly figure (see render_chart_images).
+    Returns None if image export is unavailable.
+    """
+    return render_chart_images([fig], width=width, height=height)[0]
+
+
 class PDFReportGenerator:
     """Generate comprehensive PDF reports with customizable options"""
     
+    # Style sheet shared by all instances (styles depend on neither page size nor orientation)
+    _styles_cache = None
+    
     def __init__(self, page_size='A4', orientation='Portrait'):
         """
         Initialize PDF generator
@@ -43,17 +125,27 @@ class PDFReportGenerator:
         self.page_size_name = page_size
         self.orientation = orientation
         
-        # Get base page size
-        base_size = PAGE_SIZES.get(page_size, A4)
-        
-        # Apply orientation
-        if orientation == 'Landscape':
-            self.page_size = landscape(base_size)
-        else:
-            self.page_size = portrait(base_size)
+        # Get page size in the requested orientation (unknown sizes fall back to A4)
+        oriented = 'Landscape' if orientation == 'Landscape' else 'Portrait'
+        self.page_size = ORIENTED_SIZES.get((page_size, oriented), ORIENTED_SIZES[('A4', oriented)])
             
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        # Build the style sheet once per process; every generator (and session thread)
+        # shares it, so styles must never be modified after setup
+        if PDFReportGenerator._styles_cache is None:
+            self.styles = getSampleStyleSheet()
+            self._setup_custom_styles()
+            PDFReportGenerator._styles_cache = self.styles
+        self.styles = PDFReportGenerator._styles_cache
+        
+        # Cover page metadata only depends on the page setup, so it is built once
+        metadata = f"""
+        <para alignment="center">
+        <b>Report Configuration</b><br/>
+        Page Size: {self.page_size_name}<br/>
+        Orientation: {self.orientation}<br/>
+        </para>
+        """
+        self._metadata_paragraph = Paragraph(metadata, self.styles['Normal'])
         
     def _setup_custom_styles(self):
         """Setup custom paragraph styles"""
@@ -89,13 +181,14 @@ class PDFReportGenerator:
             fontName='Helvetica-Bold'
         ))
         
-    def create_cover_page(self, title="Timesheet Analytics Report", subtitle=None):
+    def create_cover_page(self, title="Timesheet Analytics Report", subtitle=None, generated_at=None):
         """
         Create a cover page
         
         Args:
             title: Main title for the report
             subtitle: Optional subtitle
+            generated_at: Optional datetime stamped on the cover (default: now)
             
         Returns:
             List of flowables for cover page
@@ -113,20 +206,14 @@ class PDFReportGenerator:
             story.append(Paragraph(subtitle, self.styles['CustomSubtitle']))
             
         # Date
-        date_str = f"Generated on: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
+        generated_at = generated_at or datetime.now()
+        date_str = f"Generated on: {generated_at.strftime('%B %d, %Y at %I:%M %p')}"
         story.append(Spacer(1, 0.5*inch))
         story.append(Paragraph(date_str, self.styles['Normal']))
         
-        # Add metadata
+        # Add metadata (a copy per story, since the layout pass stores state on flowables)
         story.append(Spacer(1, 1*inch))
-        metadata = f"""
-        <para alignment="center">
-        <b>Report Configuration</b><br/>
-        Page Size: {self.page_size_name}<br/>
-        Orientation: {self.orientation}<br/>
-        </para>
-        """
-        story.append(Paragraph(metadata, self.styles['Normal']))
+        story.append(copy.copy(self._metadata_paragraph))
         
         # Page break after cover
         story.append(PageBreak())
@@ -149,9 +236,7 @@ class PDFReportGenerator:
         story.append(Spacer(1, 0.3*inch))
         
         # Create table data
-        table_data = [['Metric', 'Value']]
-        for key, value in metrics_dict.items():
-            table_data.append([key, str(value)])
+        table_data = [['Metric', 'Value']] + [[key, str(value)] for key, value in metrics_dict.items()]
             
         # Create table
         table = Table(table_data, colWidths=[3*inch, 2*inch])
@@ -192,10 +277,9 @@ class PDFReportGenerator:
         # Limit rows
         df_subset = df.head(max_rows)
         
-        # Create table data
-        table_data = [df_subset.columns.tolist()]
-        for _, row in df_subset.iterrows():
-            table_data.append([str(val)[:50] for val in row.values])  # Truncate long values
+        # Create table data: cells as text, truncated column-wise (long values cut at 50 chars)
+        cells = df_subset.astype(str).apply(lambda col: col.str.slice(0, 50))
+        table_data = [df_subset.columns.tolist()] + cells.to_numpy().tolist()
             
         # Create table
         table = Table(table_data)
@@ -220,7 +304,7 @@ class PDFReportGenerator:
         
         return story
     
-    def add_chart_image(self, fig, title="Chart", width=6*inch, height=4*inch):
+    def add_chart_image(self, fig, title="Chart", width=6*inch, height=4*inch, image=None):
         """
         Convert Plotly figure to image and add to PDF
         Falls back to chart description if image conversion fails
@@ -230,6 +314,7 @@ class PDFReportGenerator:
             title: Chart title
             width: Image width
             height: Image height
+            image: Optional PNG bytes already rendered for fig (see render_chart_image)
             
         Returns:
             List of flowables
@@ -240,9 +325,12 @@ class PDFReportGenerator:
         story.append(Spacer(1, 0.2*inch))
         
         try:
-            # Try to convert plotly figure to image using kaleido
-            img_bytes = pio.to_image(fig, format="png", width=800, height=600, engine="kaleido")
-            img = Image(io.BytesIO(img_bytes), width=width, height=height)
+            # Use the pre-rendered PNG if given, otherwise convert the plotly figure using kaleido
+            if image is None:
+                image = render_chart_image(fig, width=width, height=height)
+            if image is None:
+                raise ValueError("Chart image export unavailable")
+            img = Image(io.BytesIO(image), width=width, height=height)
             story.append(img)
         except Exception as e:
             # Fallback: Add a note that chart is not available in PDF
@@ -259,7 +347,7 @@ class PDFReportGenerator:
         
         return story
     
-    def generate_report(self, output_buffer, include_cover=True, sections=None):
+    def generate_report(self, output_buffer, include_cover=True, sections=None, generated_at=None):
         """
         Generate complete PDF report
         
@@ -267,6 +355,7 @@ class PDFReportGenerator:
             output_buffer: BytesIO buffer to write PDF to
             include_cover: Whether to include cover page
             sections: List of section dictionaries with 'type' and 'data' keys
+            generated_at: Optional datetime for the cover page (default: now)
             
         Returns:
             BytesIO buffer with PDF content
@@ -285,7 +374,7 @@ class PDFReportGenerator:
         
         # Add cover page
         if include_cover:
-            story.extend(self.create_cover_page())
+            story.extend(self.create_cover_page(generated_at=generated_at))
             
         # Add sections
         if sections:
@@ -304,7 +393,8 @@ class PDFReportGenerator:
                 elif section_type == 'chart':
                     story.extend(self.add_chart_image(
                         section_data.get('fig'),
-                        title=section_data.get('title', 'Chart')
+                        title=section_data.get('title', 'Chart'),
+                        image=section_data.get('image')
                     ))
                 elif section_type == 'pagebreak':
                     story.append(PageBreak())
@@ -322,12 +412,14 @@ def create_timesheet_report(df, metrics, charts, config):
     Args:
         df: Main dataframe (deprecated, use config['tables'] instead)
         metrics: Dictionary of summary metrics
-        charts: List of plotly figures with titles
+        charts: List of plotly figures with titles (and optional pre-rendered 'image' PNG bytes;
+                the others are rendered up front)
         config: Report configuration dict with keys:
             - page_size: str
             - orientation: str
             - include_cover: bool
             - tables: list of table dicts with 'name', 'df', 'title'
+            - generated_at: datetime shown on the cover (optional, default: now)
             
     Returns:
         BytesIO buffer with PDF
@@ -349,13 +441,17 @@ def create_timesheet_report(df, metrics, charts, config):
     
     sections.append({'type': 'pagebreak'})
     
-    # Charts
-    for chart_info in charts:
+    # Charts: rasterize the ones without an image up front
+    pending = [i for i, chart_info in enumerate(charts) if chart_info.get('image') is None]
+    rendered = dict(zip(pending, render_chart_images([charts[i]['fig'] for i in pending])))
+    
+    for i, chart_info in enumerate(charts):
         sections.append({
             'type': 'chart',
             'data': {
                 'fig': chart_info['fig'],
-                'title': chart_info.get('title', 'Chart')
+                'title': chart_info.get('title', 'Chart'),
+                'image': rendered.get(i, chart_info.get('image'))
             }
         })
         
@@ -379,7 +475,8 @@ def create_timesheet_report(df, metrics, charts, config):
     generator.generate_report(
         buffer,
         include_cover=config.get('include_cover', True),
-        sections=sections
+        sections=sections,
+        generated_at=config.get('generated_at')
     )
     
     buffer.seek(0)